@@ -0,0 +1,10 @@
+from google.protobuf.internal import api_implementation
+from ma_dataplatforms_streaming_support_library.core.base.logger import ILogger
+
+
+# Every packet read or written is parsed or serialised with protobuf, so make sure the native upb backend is used
+# rather than the much slower pure Python one.
+def check_protobuf_implementation(logger: ILogger) -> None:
+    if api_implementation.Type() == "python":
+        logger.warning("Using the pure Python protobuf implementation, packet parsing and serialisation will be slow. "
+                       "Unset PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION to use the native upb backend.")
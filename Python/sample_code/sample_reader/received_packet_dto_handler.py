@@ -1,9 +1,25 @@
+import threading
+from collections import OrderedDict
+from itertools import count
+from typing import Iterable, Optional, Sequence, Tuple
+
 from ma_dataplatforms_streaming_support_library.contracts.data_format_management.i_data_format_management_service import \
     IDataFormatManagementService
 from ma_dataplatforms_streaming_support_library.contracts.packet_reading.received_packet_dto import ReceivedPacketDto
 from ma_dataplatforms_streaming_support_library.contracts.shared.i_handler import IHandler
 from ma_dataplatforms_streaming_support_library.core.base.logger import ILogger
-from ma_dataplatforms_streaming_support_library.protos.open_data_pb2 import Packet, PeriodicDataPacket
+from ma_dataplatforms_streaming_support_library.protos.open_data_pb2 import DataStatus, Packet, PeriodicDataPacket
+
+# A serialised packet has its fields written in field number order, so a periodic data packet starts with its encoded
+# type. Packets starting with a different type can be skipped without parsing them.
+_PERIODIC_DATA_TYPE = "PeriodicData"
+_PERIODIC_DATA_PREFIX = Packet(type=_PERIODIC_DATA_TYPE).SerializeToString()
+_TYPE_TAG = _PERIODIC_DATA_PREFIX[:-len(_PERIODIC_DATA_TYPE.encode()) - 1]
+
+# The names of the data statuses, keyed by value. DataStatus is an open enum, so a sample can carry a status this
+# version of the protocol does not name. Those are logged as their number.
+_DATA_STATUS_NAMES = {value: name for name, value in DataStatus.items()}
+
 
 # This is a sample handler class that handles the ReceivedPacketDto from the packet reader and then displays the
 # sample values of a parameter on the console.
@@ -13,48 +29,113 @@ class ReceivedPacketDtoHandler(IHandler[ReceivedPacketDto]):
         self._logger = logger
         self._data_format_management_service = data_format_management_service
         self.__interested_parameter = "vCar:Chassis"
+        # The number of parameters and the column index of the interested parameter for each data format, keyed by
+        # data source and data format identifier. The same data format is used for the whole session, so this saves a
+        # call into the library and a search through the parameters for every packet. The column index is -1 if the
+        # interested parameter is not in the data format. The least recently used entry is dropped once the cache is
+        # full.
+        self.__column_cache: OrderedDict[Tuple[str, int], Tuple[int, int]] = OrderedDict()
+        self.__column_cache_size = 1024
+        self.__column_cache_lock = threading.Lock()
 
     def handle(self, packet: ReceivedPacketDto) -> None:
-        # Create an empty packet object and fill the values from the packet bytes data.
-        open_data_packet = Packet()
-        open_data_packet.ParseFromString(packet.packet_bytes.data)
+        samples = self.__format_samples(packet)
+        if samples is not None:
+            self._logger.info(samples)
+
+    # Handles a batch of packets, logging the samples of the whole batch in a single call.
+    # Use this when the packets are buffered before being handed over, so the batch is processed in one go.
+    def handle_many(self, packets: Iterable[ReceivedPacketDto]) -> None:
+        samples = [batch for batch in map(self.__format_samples, packets) if batch is not None]
+        if len(samples) > 0:
+            self._logger.info("\n".join(samples))
 
+    # Gets the sample lines of the interested parameter in a packet, or None if there is nothing to display.
+    def __format_samples(self, packet: ReceivedPacketDto) -> Optional[str]:
         # This one filters to only process periodic data. This can be changed as all data from the open data protocol is
         # available.
-        if open_data_packet.type != "PeriodicData":
-            return
+        # When the type is the first field in the bytes, other packet types are dropped before parsing.
+        packet_bytes = packet.packet_bytes.data
+        if packet_bytes.startswith(_TYPE_TAG) and not packet_bytes.startswith(_PERIODIC_DATA_PREFIX):
+            return None
+
+        # Create an empty packet object and fill the values from the packet bytes data.
+        open_data_packet = Packet()
+        open_data_packet.ParseFromString(packet_bytes)
+        if open_data_packet.type != _PERIODIC_DATA_TYPE:
+            return None
 
         # Depending on the data type, we then parse it accordingly.
         periodic_packet = PeriodicDataPacket()
         periodic_packet.ParseFromString(open_data_packet.content)
 
         # Check to see if the packet has parameter identifiers included.
-        if len(periodic_packet.data_format.parameter_identifiers.parameter_identifiers) > 0:
-            parameters = periodic_packet.data_format.parameter_identifiers.parameter_identifiers
+        parameter_identifiers = periodic_packet.data_format.parameter_identifiers.parameter_identifiers
+        if len(parameter_identifiers) > 0:
+            column = self.__find_column(parameter_identifiers)
         else:
             # if not, we then use the data format identifier and ask the data format management service for the parameter
             # list.
-            parameters_result = self._data_format_management_service.get_parameters_list(packet.data_source,
-                                                                                         periodic_packet.data_format.data_format_identifier)
-            if not parameters_result.success or parameters_result.data is None:
-                self._logger.error("Failed to get parameters")
-                return
-            parameters = parameters_result.data.parameter_list
-
-        assert len(parameters) == len(
+            column = self.__get_column(packet.data_source, periodic_packet.data_format.data_format_identifier)
+            if column is None:
+                return None
+
+        parameter_count, column_index = column
+        assert parameter_count == len(
             periodic_packet.columns), "length of parameters should be equal to number of columns"
-        for i in range(len(parameters)):
-            # check if the interested parameter is in the list.
-            if parameters[i] != self.__interested_parameter:
-                continue
-
-            # If it is, then get the data column corresponding to that parameter.
-            # Then calculate the timestamp based on the start time and the interval.
-            data_column = periodic_packet.columns[i]
-            if data_column.WhichOneof("list") == "double_samples":
-                sample_list = data_column.double_samples.samples
-                for j in range(len(sample_list)):
-                    timestamp = periodic_packet.start_time + j * periodic_packet.interval
-                    sample = sample_list[j]
-                    self._logger.info(
-                        f"Sample {self.__interested_parameter}: Timestamp {timestamp} -> {sample.value} Status: {sample}")
+        # Check if the interested parameter is in the list.
+        if column_index < 0:
+            return None
+
+        # If it is, then get the data column corresponding to that parameter.
+        # Then calculate the timestamp based on the start time and the interval.
+        data_column = periodic_packet.columns[column_index]
+        if data_column.WhichOneof("list") != "double_samples":
+            return None
+
+        sample_list = data_column.double_samples.samples
+        if len(sample_list) == 0:
+            return None
+
+        # The timestamps are generated alongside the samples and all the lines are handed to the logger together,
+        # rather than logging every sample separately.
+        # Only the status name is logged, as formatting the whole sample message is expensive.
+        interested_parameter = self.__interested_parameter
+        status_name = _DATA_STATUS_NAMES.get
+        timestamps = count(periodic_packet.start_time, periodic_packet.interval)
+        return "\n".join(
+            f"Sample {interested_parameter}: Timestamp {timestamp} -> {sample.value} "
+            f"Status: {status_name(sample.status, sample.status)}"
+            for timestamp, sample in zip(timestamps, sample_list))
+
+    # Gets the number of parameters and the interested column index of a data format, only asking the data format
+    # management service when it is not cached.
+    def __get_column(self, data_source: str, data_format_identifier: int) -> Optional[Tuple[int, int]]:
+        key = (data_source, data_format_identifier)
+        with self.__column_cache_lock:
+            column = self.__column_cache.get(key)
+            if column is not None:
+                self.__column_cache.move_to_end(key)
+                return column
+
+        parameters_result = self._data_format_management_service.get_parameters_list(data_source,
+                                                                                     data_format_identifier)
+        if not parameters_result.success or parameters_result.data is None:
+            self._logger.error("Failed to get parameters")
+            return None
+
+        column = self.__find_column(parameters_result.data.parameter_list)
+        with self.__column_cache_lock:
+            self.__column_cache[key] = column
+            if len(self.__column_cache) > self.__column_cache_size:
+                self.__column_cache.popitem(last=False)
+        return column
+
+    # Gets the number of parameters and the index of the interested parameter in them, or -1 if it is not there.
+    # The lookup is done by the list itself rather than by walking through the parameters one at a time.
+    def __find_column(self, parameters: Sequence[str]) -> Tuple[int, int]:
+        parameter_list = list(parameters)
+        try:
+            return len(parameter_list), parameter_list.index(self.__interested_parameter)
+        except ValueError:
+            return len(parameter_list), -1
@@ -1,3 +1,7 @@
+import threading
+from queue import SimpleQueue
+from typing import Optional, Tuple
+
 from ma_dataplatforms_streaming_support_library.contracts.packet_reading.coverage_cursor_info import CoverageCursorInfo
 from ma_dataplatforms_streaming_support_library.contracts.packet_reading.i_packet_reader_service import \
     IPacketReaderService
@@ -8,10 +12,15 @@ from ma_dataplatforms_streaming_support_library.contracts.session_management.ses
 from ma_dataplatforms_streaming_support_library.core.base.logger import ILogger
 
 # This class just shows how to subscribe and unsubscribe from events from the packet reader.
+# The events are raised on the packet reader's threads, so the handlers only queue them up and a background thread
+# formats and logs them, keeping the packet reader from waiting on the logger.
 class SessionNotifier:
     def __init__(self, packet_reader_service: IPacketReaderService, logger: ILogger):
         self.__packet_reader_service = packet_reader_service
         self.__logger = logger
+        self.__events: SimpleQueue[Optional[Tuple[str, object]]] = SimpleQueue()
+        self.__event_logging_thread = threading.Thread(target=self.__log_events, daemon=True)
+        self.__event_logging_thread.start()
 
         # subscribe to support lib events
         self.__packet_reader_service.session_reading_started.subscribe(self.__on_session_reading_started)
@@ -31,29 +40,38 @@ class SessionNotifier:
         self.__packet_reader_service.coverage_cursor_received.unsubscribe(self.__on_coverage_cursor_received)
         self.__packet_reader_service.session_association_info_updated.unsubscribe(self.__on_session_association_updated)
 
+        # Stop the logging thread once the events already queued are logged.
+        self.__events.put(None)
+        self.__event_logging_thread.join()
+
+    def __log_events(self):
+        while (event := self.__events.get()) is not None:
+            message, info = event
+            self.__logger.info(message.format(info))
+
     # All calling methods much conform to the C# style event handlers.
     def __on_session_reading_started(self, sender: object, session_info: SessionInfo):
-        self.__logger.info(
-            f"Session reading started for session {session_info.identifier} with session key {session_info.session_key}")
+        self.__events.put(
+            ("Session reading started for session {0.identifier} with session key {0.session_key}", session_info))
 
     def __on_session_reading_complete(self, sender: object, session_info: SessionInfo):
-        self.__logger.info(
-            f"Session reading completed for session {session_info.identifier} with session key {session_info.session_key}")
+        self.__events.put(
+            ("Session reading completed for session {0.identifier} with session key {0.session_key}", session_info))
 
     def __on_stream_reading_started(self, sender: object, stream_info: StreamInfo):
-        self.__logger.info(
-            f"Stream reading started for session key {stream_info.session_key} with stream name {stream_info.stream}")
+        self.__events.put(
+            ("Stream reading started for session key {0.session_key} with stream name {0.stream}", stream_info))
 
     def __on_stream_reading_complete(self, sender: object, stream_info: StreamInfo):
-        self.__logger.info(
-            f"Stream reading completed for session key {stream_info.session_key} with stream name {stream_info.stream}")
+        self.__events.put(
+            ("Stream reading completed for session key {0.session_key} with stream name {0.stream}", stream_info))
 
     def __on_session_info_updated(self, sender: object, session_info: SessionInfo):
-        self.__logger.info(f"Session info updated to {session_info}")
+        self.__events.put(("Session info updated to {0}", session_info))
 
     def __on_coverage_cursor_received(self, sender: object, coverage_cursor_info: CoverageCursorInfo):
-        self.__logger.info(
-            f"Coverage Cursor received with new timestamp at {coverage_cursor_info.coverage_cursor_time}")
+        self.__events.put(
+            ("Coverage Cursor received with new timestamp at {0.coverage_cursor_time}", coverage_cursor_info))
 
     def __on_session_association_updated(self, sender: object, session_association_info: SessionAssociationInfo):
-        self.__logger.info(f"Session Association updated to {session_association_info}")
+        self.__events.put(("Session Association updated to {0}", session_association_info))
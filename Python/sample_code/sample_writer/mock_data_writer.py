@@ -1,6 +1,8 @@
 import datetime
+import threading
 import time
-from typing import Optional, List
+from queue import SimpleQueue
+from typing import Optional, List, Tuple
 
 from ma_dataplatforms_streaming_support_library.contracts.data_format_management.i_data_format_management_service import \
     IDataFormatManagementService
@@ -21,6 +23,24 @@ from ma_dataplatforms_streaming_support_library.protos.open_data_pb2 import Pack
 from sample_code.sample_writer.packet_id_generator import PacketIdGenerator
 from sample_code.sample_writer.periodic_packet_generator import PeriodicPacketGenerator
 
+# The configuration packet defines the sine wave parameter. It is the same for every session, so it is built and
+# serialised once when the module is loaded.
+def _create_config_packet() -> ConfigurationPacket:
+    parameter_definition = ParameterDefinition(identifier="Sin:MyApp", name="Sin", application_name="MyApp",
+                                               description="Sine Wave", groups=[], units="test unit",
+                                               data_type=DataType.DATA_TYPE_FLOAT64, format_string="%5.2f",
+                                               min_value=-1, max_value=1, warning_max_value=-1, warning_min_value=1,
+                                               frequencies=[100], includes_row_data=False,
+                                               includes_synchro_data=False, conversion=None, formula=None)
+    group_definition = GroupDefinition(identifier="MyApp", name="MyApp", application_name="MyApp",
+                                       description="MyApp", groups=[])
+    return ConfigurationPacket(config_id="ConfigPacket", parameter_definitions=[parameter_definition],
+                               group_definitions=[group_definition])
+
+
+_CONFIG_PACKET_BYTES = _create_config_packet().SerializeToString()
+
+
 # This class is a sample on how to write data into the stream. It uses the packet writer service, session management,
 # and data format management to create a session with a sine wave parameter.
 class MockDataWriter:
@@ -34,7 +54,11 @@ class MockDataWriter:
         self.__logger = logger
         self.__packet_id_generator = PacketIdGenerator()
         self.__streams = ["", "Stream1"]
-        self.__number_of_packets = 100
+        # The number of sine wave cycles written to the session, each one 100 samples long.
+        self.__number_of_cycles = 100
+        # The number of cycles sent together in a single periodic packet.
+        self.__batch_size = 10
+        assert self.__number_of_cycles % self.__batch_size == 0, "number of cycles should be a multiple of batch size"
 
     def create_start_write_and_end_mock_session(self):
         # Create the session
@@ -52,12 +76,8 @@ class MockDataWriter:
         self.__start_session(session_info)
 
         # Send config packet to the stream (needed for the stream api recorder)
-        config_packet = self.__create_config_packet()
-        success = self.__create_and_send_packet(
-            Packet(type="Configuration", session_key=session_info.session_key, is_essential=True,
-                   content=config_packet.SerializeToString(), id=self.__packet_id_generator.get_packet_id()),
-            session_info.data_source,
-            session_info.session_key, "")
+        success = self.__create_and_send_packet("Configuration", _CONFIG_PACKET_BYTES, session_info.data_source,
+                                                session_info.session_key, "", is_essential=True)
 
         if not success:
             self.__logger.error("Failed to send config packet")
@@ -80,62 +100,68 @@ class MockDataWriter:
         # Send an Out Lap so ATLAS can properly overlay it over other sessions
         lap_packet = MarkerPacket(timestamp=first_timestamp, label="Out Lap", type="Lap Trigger",
                                   description="Out Lap Marker", source="0", value=1)
-        self.__create_and_send_packet(
-            Packet(type="Marker", session_key=session_info.session_key, is_essential=False,
-                   content=lap_packet.SerializeToString(), id=self.__packet_id_generator.get_packet_id()),
-            session_info.data_source,
-            session_info.session_key, "")
+        self.__create_and_send_packet("Marker", lap_packet.SerializeToString(), session_info.data_source,
+                                      session_info.session_key, "")
 
         # It's possible to update session information after the session is created.
         new_session_detail = SessionInfoPacket(data_source=session_info.data_source, identifier=session_info.identifier,
                                                type=session_info.type, version=session_info.version,
                                                details={"Test Detail": "Test Value"})
-        self.__create_and_send_session_info_packet(
-            Packet(type="SessionInfo", session_key=session_info.session_key, is_essential=False,
-                   content=new_session_detail.SerializeToString(), id=self.__packet_id_generator.get_packet_id()))
+        self.__create_and_send_session_info_packet(new_session_detail.SerializeToString(), session_info.session_key)
 
         # Generate data
-        periodic_packet_generator = PeriodicPacketGenerator(100, data_format_id, first_timestamp)
-
-        for i in range(self.__number_of_packets):
-            periodic_packet = periodic_packet_generator.generate_packets()
-            self.__create_and_send_packet(
-                Packet(type="PeriodicData", session_key=session_info.session_key, is_essential=False,
-                       content=periodic_packet.SerializeToString(), id=self.__packet_id_generator.get_packet_id()),
-                session_info.data_source, session_info.session_key, "Stream1")
+        periodic_packet_generator = PeriodicPacketGenerator(100, data_format_id, first_timestamp, self.__batch_size)
+
+        # The periodic packets are written by a background thread, so the next packet is generated while the previous
+        # one is being written to the stream.
+        # The queue does not need a bound, because the generator sleeps for the time each packet covers (10 seconds with
+        # the batch size above). Packets are queued far slower than they are written, so at most one or two are ever
+        # waiting. Bound it if the pacing in the generator is removed.
+        packets_to_write: SimpleQueue[Optional[Tuple[str, bytes, str, str, str]]] = SimpleQueue()
+        packet_writing_thread = threading.Thread(target=self.__write_queued_packets, args=(packets_to_write,),
+                                                 daemon=True)
+        packet_writing_thread.start()
+        data_source = session_info.data_source
+        session_key = session_info.session_key
+        generate_packet = periodic_packet_generator.generate_packets
+        queue_packet = packets_to_write.put
+        for _ in range(self.__number_of_cycles // self.__batch_size):
+            queue_packet(("PeriodicData", generate_packet().SerializeToString(), data_source, session_key, "Stream1"))
+
+        # Wait for all the periodic packets to be written before ending the session.
+        packets_to_write.put(None)
+        packet_writing_thread.join()
 
         # End session by sending an EndSessionPackets to each stream you have written to and then calling end session to the session itself.
         self.__end_session(session_info.data_source, session_info.session_key)
 
     @staticmethod
     def __create_timestamps(number_of_samples: int, first_timestamp: int, frequency: float) -> List[int]:
-        timestamps = []
         period = 1E9 / frequency
-        for i in range(number_of_samples):
-            timestamps.append(int(first_timestamp + i * period))
-
-        return timestamps
-
-    @staticmethod
-    def __create_config_packet() -> Packet:
-        parameter_definition = ParameterDefinition(identifier="Sin:MyApp", name="Sin", application_name="MyApp",
-                                                   description="Sine Wave", groups=[], units="test unit",
-                                                   data_type=DataType.DATA_TYPE_FLOAT64, format_string="%5.2f",
-                                                   min_value=-1, max_value=1, warning_max_value=-1, warning_min_value=1,
-                                                   frequencies=[100], includes_row_data=False,
-                                                   includes_synchro_data=False, conversion=None, formula=None)
-        group_definition = GroupDefinition(identifier="MyApp", name="MyApp", application_name="MyApp",
-                                           description="MyApp", groups=[])
-        return ConfigurationPacket(config_id="ConfigPacket", parameter_definitions=[parameter_definition],
-                                   group_definitions=[group_definition])
-
-    def __create_and_send_packet(self, packet: Packet, data_source: str, session_key: str, stream: str) -> bool:
-        packet_bytes = PacketBytes(packet.SerializeToString())
+        return [int(first_timestamp + i * period) for i in range(number_of_samples)]
+
+    def __write_queued_packets(self, packets_to_write: "SimpleQueue[Optional[Tuple[str, bytes, str, str, str]]]"):
+        while (packet := packets_to_write.get()) is not None:
+            # Nothing waits on the result of a queued packet, so a failed write is logged here.
+            if not self.__create_and_send_packet(*packet):
+                self.__logger.error(f"Failed to send {packet[0]} packet")
+
+    # Wraps the serialised content in a Packet with the next packet id. Every packet sent is built here, once its content
+    # is serialised, so each packet is serialised exactly once.
+    def __create_packet_bytes(self, packet_type: str, content: bytes, session_key: str,
+                              is_essential: bool = False) -> PacketBytes:
+        packet = Packet(type=packet_type, session_key=session_key, is_essential=is_essential, content=content,
+                        id=self.__packet_id_generator.get_packet_id())
+        return PacketBytes(packet.SerializeToString())
+
+    def __create_and_send_packet(self, packet_type: str, content: bytes, data_source: str, session_key: str,
+                                 stream: str, is_essential: bool = False) -> bool:
+        packet_bytes = self.__create_packet_bytes(packet_type, content, session_key, is_essential)
         result = self.__packet_writer_service.write_data(data_source, stream, session_key, packet_bytes)
         return result.success
 
-    def __create_and_send_session_info_packet(self, session_info: Packet) -> bool:
-        packet_bytes = PacketBytes(session_info.SerializeToString())
+    def __create_and_send_session_info_packet(self, content: bytes, session_key: str) -> bool:
+        packet_bytes = self.__create_packet_bytes("SessionInfo", content, session_key)
         result = self.__packet_writer_service.write_info(packet_bytes, InfoType.SESSION_INFO)
         return result.success
 
@@ -149,20 +175,18 @@ class MockDataWriter:
                                                                              version=session_info.version,
                                                                              details=session_info.details,
                                                                              associate_session_keys=session_info.associate_session_keys))
+        # The content is the same for every stream, so it is only serialised once.
+        content = new_session_packet.SerializeToString()
         for stream in self.__streams:
-            self.__create_and_send_packet(
-                Packet(type="NewSession", session_key=session_info.session_key, is_essential=False,
-                       content=new_session_packet.SerializeToString(), id=self.__packet_id_generator.get_packet_id()),
-                session_info.data_source,
-                session_info.session_key, stream)
+            self.__create_and_send_packet("NewSession", content, session_info.data_source, session_info.session_key,
+                                          stream)
 
     def __end_session(self, data_source: str, session_key: str) -> bool:
         end_session_packet = EndOfSessionPacket(data_source=data_source)
+        # The content is the same for every stream, so it is only serialised once.
+        content = end_session_packet.SerializeToString()
         for stream in self.__streams:
-            self.__create_and_send_packet(
-                Packet(type="EndOfSession", session_key=session_key, is_essential=False,
-                       content=end_session_packet.SerializeToString(), id=self.__packet_id_generator.get_packet_id()),
-                data_source, session_key, stream)
+            self.__create_and_send_packet("EndOfSession", content, data_source, session_key, stream)
 
         response = self.__session_management_service.end_session(data_source, session_key)
         return response.success
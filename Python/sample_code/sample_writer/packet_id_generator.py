@@ -1,8 +1,10 @@
+from itertools import count
+
+
 class PacketIdGenerator:
     def __init__(self):
-        self.__packet_id = 0
+        # Each call to next gives the following id, starting from 0.
+        self.__packet_ids = count()
 
     def get_packet_id(self) -> int:
-        packet_id = self.__packet_id
-        self.__packet_id += 1
-        return packet_id
\ No newline at end of file
+        return next(self.__packet_ids)
\ No newline at end of file
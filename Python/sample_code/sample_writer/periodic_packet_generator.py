@@ -1,38 +1,38 @@
 import math
 import time
 
-from ma_dataplatforms_streaming_support_library.protos.open_data_pb2 import PeriodicDataPacket, DoubleSample, \
-    DataStatus, SampleDataFormat, SampleColumn, DoubleSampleList
+from ma_dataplatforms_streaming_support_library.protos.open_data_pb2 import PeriodicDataPacket, DataStatus, \
+    SampleDataFormat
 
 # This class is a sample on how to generate periodic packets for use in the stream.
+# Each packet holds batch_size cycles of the sine wave, so fewer and larger packets are written to the stream.
 class PeriodicPacketGenerator:
-    def __init__(self, frequency, data_format_id, first_timestamp):
+    def __init__(self, frequency, data_format_id, first_timestamp, batch_size=1):
         self.__interval = int(1E9 / frequency)
         self.__data_format_id = data_format_id
         self.__first_timestamp = first_timestamp
-
-    def generate_packets(self) -> PeriodicDataPacket:
-        double_samples = []
-        x_value = 0
+        self.__status = DataStatus.DATA_STATUS_VALID
+        # Every packet holds the same sine values, so they are worked out once here and reused for each packet.
         sample_count = 100
         intervals = (2 * math.pi) / sample_count
-        for i in range(sample_count):
-            start_time = self.__generate_current_timestamp()
-            double_samples.append(DoubleSample(value=math.sin(x_value), status=DataStatus.DATA_STATUS_VALID))
-            end_time = self.__generate_current_timestamp()
-            x_value += intervals
-            # This sleep is to keep the speed at which the packet is sent close to real time.
-            time.sleep((self.__interval - (end_time - start_time)) / 1E9)
+        self.__values = [math.sin(i * intervals) for i in range(sample_count)] * batch_size
 
+    def generate_packets(self) -> PeriodicDataPacket:
+        generation_start = time.perf_counter()
+        values = self.__values
+        # The samples are added straight into the packet's sample list, rather than being created separately and then
+        # copied into it.
         packet = PeriodicDataPacket(data_format=SampleDataFormat(data_format_identifier=self.__data_format_id),
                                     start_time=self.__first_timestamp,
-                                    interval=self.__interval,
-                                    columns=[SampleColumn(double_samples=DoubleSampleList(samples=double_samples))])
+                                    interval=self.__interval)
+        add_sample = packet.columns.add().double_samples.samples.add
+        status = self.__status
+        for value in values:
+            add_sample(value=value, status=status)
 
-        self.__first_timestamp += self.__interval * sample_count
-        return packet
+        # This sleep is to keep the speed at which the packet is sent close to real time. It waits for the time the
+        # whole packet covers, less the time taken to generate it.
+        time.sleep(max(0.0, self.__interval * len(values) / 1E9 - (time.perf_counter() - generation_start)))
 
-    # Generates a timestamp based on UTC epoch.
-    @staticmethod
-    def __generate_current_timestamp() -> int:
-        return int(time.time() * 1E9)
+        self.__first_timestamp += self.__interval * len(values)
+        return packet
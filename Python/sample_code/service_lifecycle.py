@@ -0,0 +1,30 @@
+import sys
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from ma_dataplatforms_streaming_support_library.contracts.shared.api_result import ApiResult
+from ma_dataplatforms_streaming_support_library.core.base.logger import ILogger
+
+TService = TypeVar("TService")
+
+
+# Every service from the support library follows the same lifecycle: it is created through its module api, which gives
+# a response whether the service is created successfully, then it must be initialised and started before using it, and
+# stopped once done with it.
+# This context manager does all of that, so the service is always stopped when leaving the with block, even when the
+# sample exits early because a service after it could not be created.
+@contextmanager
+def running_service(create_service: Callable[..., ApiResult[Optional[TService]]], logger: ILogger, service_name: str,
+                    *args: Any) -> Iterator[TService]:
+    service_response = create_service(*args)
+    if not service_response.success or service_response.data is None:
+        logger.error(f"Failed to create {service_name}")
+        sys.exit(1)
+
+    service = service_response.data
+    service.initialise()
+    service.start()
+    try:
+        yield service
+    finally:
+        service.stop()